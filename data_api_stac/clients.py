@@ -0,0 +1,81 @@
+import threading
+
+import boto3
+import requests
+from botocore.config import Config
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .globals import (
+    DATA_API_MAX_REQUESTS,
+    DATA_API_URL,
+    HTTP_POOL_SIZE,
+    S3_UPLOAD_WORKERS,
+)
+
+_local = threading.local()
+
+# dataset and version workers all query the Data API, so the total number of
+# requests in flight is capped across threads to stay within its rate limits
+_data_api_requests = threading.BoundedSemaphore(DATA_API_MAX_REQUESTS)
+
+# boto3 clients are thread-safe, so a single one is shared by all workers
+s3_client = boto3.client(
+    "s3",
+    config=Config(
+        max_pool_connections=S3_UPLOAD_WORKERS * 2,
+        retries={"mode": "adaptive", "total_max_attempts": 5},
+    ),
+)
+
+
+class _BoundedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that waits for a slot of a shared semaphore before sending"""
+
+    def __init__(self, semaphore: threading.BoundedSemaphore, **kwargs):
+        self._semaphore = semaphore
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        with self._semaphore:
+            return super().send(request, **kwargs)
+
+
+def _retry() -> Retry:
+    return Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False,
+    )
+
+
+def get_session() -> requests.Session:
+    """Returns the calling thread's Data API session, creating it on first use.
+
+    Sessions are not guaranteed to be thread-safe, so each worker thread gets
+    its own, which keeps its connections (and TLS handshakes) alive across calls.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=_retry(),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        # requests picks the adapter with the longest matching prefix
+        session.mount(
+            DATA_API_URL,
+            _BoundedHTTPAdapter(
+                _data_api_requests,
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=_retry(),
+            ),
+        )
+        _local.session = session
+
+    return session
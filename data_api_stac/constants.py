@@ -1,8 +1,10 @@
 from enum import Enum
 
 
+PROJECTION_EXTENSION = "https://stac-extensions.github.io/projection/v1.0.0/schema.json"
+
 RASTER_EXTENSIONS = [
-    "https://stac-extensions.github.io/projection/v1.0.0/schema.json",
+    PROJECTION_EXTENSION,
     "https://stac-extensions.github.io/raster/v1.0.0/schema.json",
 ]
 
@@ -10,6 +12,9 @@ TABULAR_EXTENSIONS = ["https://stac-extensions.github.io/table/v1.2.0/schema.jso
 
 DATASET_EXTENSIONS = ["https://stac-extensions.github.io/version/v1.0.0/schema.json"]
 
+# used by the catalog and the dataset and version collections
+COLLECTION_EXTENSIONS = [PROJECTION_EXTENSION] + DATASET_EXTENSIONS
+
 
 class AssetType(str, Enum):
     raster_tile_set = "Raster tile set"
@@ -1,34 +1,51 @@
 #!/usr/bin/env python
 
-import json
-from collections import OrderedDict
-from datetime import datetime
-from io import StringIO
-from ipaddress import collapse_addresses
-from typing import Optional, Union
+import threading
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 from urllib.parse import urlparse
 
-import boto3
-import click
+import orjson
 import pystac
-import requests
-from pystac import Catalog, Collection, Extent
-from pystac.extensions.table import Column, TableExtension
+from pystac import (
+    Catalog,
+    Collection,
+    Extent,
+    Item,
+    Link,
+    SpatialExtent,
+    TemporalExtent,
+)
 from pystac.extensions.version import VersionExtension
+from pystac.layout import (
+    BestPracticesLayoutStrategy,
+    CustomLayoutStrategy,
+    HrefLayoutStrategy,
+)
 
 # from shapely.geometry import box, shape
 # from shapely.ops import unary_union
 from urllib3.exceptions import HTTPError
 
-from data_api_stac.constants import TABULAR_EXTENSIONS, AssetType
-from data_api_stac.globals import CATALOG_NAME, DATA_API_URL, STAC_BUCKET, logger
+from data_api_stac.clients import get_session, s3_client
+from data_api_stac.constants import (
+    COLLECTION_EXTENSIONS,
+    AssetType,
+)
+from data_api_stac.globals import (
+    CATALOG_NAME,
+    CATALOG_WORKERS,
+    DATA_API_URL,
+    S3_UPLOAD_WORKERS,
+    STAC_BUCKET,
+    STAC_BUCKET_URL,
+    VERSION_WORKERS,
+    logger,
+)
 from data_api_stac.raster_objects import create_raster_collection
-from data_api_stac.tabular_objects import create_tabular_collection
-
-stac_extensions = [
-    "https://stac-extensions.github.io/projection/v1.0.0/schema.json",
-    "https://stac-extensions.github.io/version/v1.0.0/schema.json",
-]
 
 # this are temporary mock dates to be able import datasets that don't
 # have content_date or content_date_range  in GFW Data API
@@ -40,20 +57,68 @@ DATASET_DATETIMES = {
     "umd_tree_cover_height_2020": datetime(2020, 1, 1),
 }
 
-CATALOG_URL = f"https://{STAC_BUCKET}.s3.amazonaws.com/{CATALOG_NAME}.json"
+CATALOG_URL = f"{STAC_BUCKET_URL}/{CATALOG_NAME}.json"
+
+# long-lived threads for Data API lookups that can run alongside another
+# request, so their thread-local sessions stay warm
+_lookup_executor = ThreadPoolExecutor(max_workers=CATALOG_WORKERS)
+
+# long-lived threads for building versions, shared by all datasets so their
+# thread-local sessions are reused instead of reopened for every dataset.
+# Each dataset only submits VERSION_WORKERS versions at a time, so this is
+# enough for all dataset workers
+_version_executor = ThreadPoolExecutor(max_workers=CATALOG_WORKERS * VERSION_WORKERS)
 
 
 class S3StacIO:
     """Class with special implementation of STACIO's save_json method to save
-    STAC objects in S3"""
+    STAC objects in S3.
 
-    def save_json(self, dest_href, data):
-        io = StringIO(json.dumps(data))
+    Objects are serialized right away but uploaded in the background; call
+    `flush` to wait for the uploads started from the current thread. Saving
+    blocks once too many uploads are queued so serialized objects don't pile
+    up in memory.
+    """
 
-        s3_client = boto3.client("s3")
-        parsed_url = urlparse(dest_href)
-        key = parsed_url.path.lstrip("/")
-        s3_client.put_object(Body=io.getvalue(), Bucket=STAC_BUCKET, Key=key)
+    _executor = ThreadPoolExecutor(max_workers=S3_UPLOAD_WORKERS)
+    _queued = threading.BoundedSemaphore(S3_UPLOAD_WORKERS * 4)
+    _pending = threading.local()
+
+    def save_json(self, dest_href, data):
+        body = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        key = urlparse(dest_href).path.lstrip("/")
+
+        self._queued.acquire()
+        try:
+            future = self._executor.submit(
+                s3_client.put_object,
+                Body=body,
+                Bucket=STAC_BUCKET,
+                Key=key,
+                ContentType="application/json",
+            )
+        except BaseException:
+            self._queued.release()
+            raise
+        future.add_done_callback(lambda _: self._queued.release())
+        self._pending_uploads().append(future)
+
+    @classmethod
+    def _pending_uploads(cls):
+        if not hasattr(cls._pending, "uploads"):
+            cls._pending.uploads = []
+        return cls._pending.uploads
+
+    @classmethod
+    def flush(cls):
+        """
+        Waits for all of this thread's pending uploads, then re-raises the
+        first failure
+        """
+        uploads, cls._pending.uploads = cls._pending_uploads(), []
+        wait(uploads)
+        for upload in uploads:
+            upload.result()
 
 
 def create_catalog():
@@ -63,8 +128,7 @@ def create_catalog():
     are saved to S3.
     """
 
-    session = requests.Session()
-    resp = session.get(f"{DATA_API_URL}/datasets")
+    resp = get_session().get(f"{DATA_API_URL}/datasets")
     if not resp.ok:
         raise HTTPError("Datasets not found.")
 
@@ -83,33 +147,38 @@ def create_catalog():
         id=CATALOG_NAME,
         description="Global Forest Watch STAC catalog",
         href=CATALOG_URL,
-        stac_extensions=stac_extensions,
+        stac_extensions=list(COLLECTION_EXTENSIONS),
         catalog_type=pystac.CatalogType.ABSOLUTE_PUBLISHED,
     )
 
-    datasets = resp.json()["data"]
-
-    for dataset in datasets:
-        logger.info(f"Creating STAC collection for {dataset['dataset']}")
-        dataset_collection = create_dataset_collection(dataset["dataset"])
+    dataset_names = [
+        dataset["dataset"] for dataset in orjson.loads(resp.content)["data"]
+    ]
 
-        if dataset_collection is None:
-            continue
-        catalog.add_child(dataset_collection)
-        dataset_collection.save_object(stac_io=S3StacIO(), include_self_link=True)
+    # datasets are built concurrently since it's mostly waiting on the Data API,
+    # but the catalog itself is only mutated from this thread
+    with ThreadPoolExecutor(max_workers=CATALOG_WORKERS) as executor:
+        for dataset_name, dataset_collection in zip(
+            dataset_names, executor.map(create_dataset_collection, dataset_names)
+        ):
+            if dataset_collection is None:
+                continue
+            logger.info(f"Adding STAC collection for {dataset_name} to catalog")
+            catalog.add_child(dataset_collection)
+            dataset_collection.save_object(stac_io=S3StacIO(), include_self_link=True)
 
     catalog.save_object(stac_io=S3StacIO())
+    S3StacIO.flush()
 
 
 def update_catalog(dataset_name: str) -> None:
     """Add or update dataset in catalog"""
     catalog = Catalog.from_file(CATALOG_URL)
-    resp = requests.get(f"{DATA_API_URL}/dataset/{dataset_name}")
-    if not resp.ok:
-        raise HTTPError("Dataset could not be fetched from DATA API.")
 
-    dataset_collection = catalog.get_child(dataset_name)
-    if dataset_collection is None:
+    # catalog.get_child and remove_child would resolve every child collection
+    # (one S3 GET each), so find the dataset's link from its href instead
+    child_link = _get_child_link(catalog, dataset_name)
+    if child_link is None:
         logger.warning(
             f"No existing STAC collection for dataset {dataset_name}. Creating new one..."
         )
@@ -117,15 +186,21 @@ def update_catalog(dataset_name: str) -> None:
         if not dataset_collection:
             return
     else:
-        dataset_collection = update_dataset_collection(dataset_collection)
+        dataset_collection = update_dataset_collection(
+            child_link.resolve_stac_object(root=catalog).target
+        )
         if not dataset_collection:
             return
+        # same as catalog.remove_child, without resolving the other children
+        catalog.links.remove(child_link)
+        dataset_collection.set_parent(None)
+        dataset_collection.set_root(None)
 
-    catalog.remove_child(dataset_collection.id)
     catalog.add_child(dataset_collection)
 
     dataset_collection.save_object(stac_io=S3StacIO(), include_self_link=True)
     catalog.save_object(stac_io=S3StacIO())
+    S3StacIO.flush()
 
 
 def create_dataset_version_collection(
@@ -133,7 +208,7 @@ def create_dataset_version_collection(
 ) -> Union[None, Collection]:
     version_url = f"{DATA_API_URL}/dataset/{dataset_name}/{version}"
     try:
-        resp = requests.get(version_url)
+        resp = get_session().get(version_url)
     except Exception as exc:
         logger.error(f"Unable to fetch {dataset_name}:{version} data: {exc}")
         return
@@ -141,7 +216,7 @@ def create_dataset_version_collection(
     if not resp.ok:
         logger.error(f"Dataset version {dataset_name}:{version} not found")
         return
-    version_data = resp.json()["data"]
+    version_data = orjson.loads(resp.content)["data"]
     version_datetime = version_data.get("content_date")
 
     if not version_datetime:
@@ -154,7 +229,7 @@ def create_dataset_version_collection(
             if not version_datetime:
                 date_str = version.split(".")[0].lstrip("v")
                 try:
-                    version_datetime = datetime.strptime(date_str, "%Y%m%d")
+                    version_datetime = _parse_version_date(date_str)
                 except ValueError:
                     logger.error(f"No datetime found for {dataset_name}:{version}")
                     return
@@ -183,77 +258,153 @@ def create_dataset_version_collection(
     if not raster_item_groups:
         return
 
-    all_items = [
-        item for collection in raster_item_groups.values() for item in collection
-    ]
+    # items are created lazily and saved as soon as they're linked to their
+    # collection, so uploads overlap with building the rest and the items
+    # aren't all kept in memory. The extents are filled in once all items
+    # have been seen.
     dataset_collection = Collection(
         id=dataset_name,
         title=title,
         description=description,
-        extent=Extent.from_items(all_items),
-        stac_extensions=stac_extensions,
+        extent=get_extent([]),
+        stac_extensions=list(COLLECTION_EXTENSIONS),
     )
     dataset_collection.set_self_href(
-        f"https://{STAC_BUCKET}.s3.amazonaws.com/{dataset_name}/{version}/{version}-collection.json",
+        f"{STAC_BUCKET_URL}/{dataset_name}/{version}/{version}-collection.json",
     )
     if len(raster_item_groups.keys()) > 1:
-        raster_collections = []
-        for raster_group, items in raster_item_groups.items():
-            raster_collection = Collection(
+        group_collections = {
+            raster_group: Collection(
                 id=raster_group,
                 # title=dataset_data["metadata"]["title"],
                 description=description,
-                extent=Extent.from_items(items),
-                stac_extensions=stac_extensions,
+                extent=get_extent([]),
+                stac_extensions=list(COLLECTION_EXTENSIONS),
             )
-            raster_collection.add_items(items)
-            raster_collections.append(raster_collection)
-        dataset_collection.add_children(raster_collections)
-        for collection in raster_collections:
-            collection.save_object(stac_io=S3StacIO(), include_self_link=True)
+            for raster_group in raster_item_groups
+        }
+        dataset_collection.add_children(group_collections.values())
+        # keep the per-group item hrefs set by create_raster_collection
+        item_layout = CustomLayoutStrategy(
+            item_func=lambda item, parent_dir: item.get_self_href()
+        )
     else:
-        dataset_collection.add_items(list(raster_item_groups.values())[0])
+        group_collections = {
+            raster_group: dataset_collection for raster_group in raster_item_groups
+        }
+        item_layout = BestPracticesLayoutStrategy()
 
-    for item in all_items:
-        item.save_object(stac_io=S3StacIO(), include_self_link=False)
+    try:
+        for raster_group, items in raster_item_groups.items():
+            collection = group_collections[raster_group]
+            collection.extent = get_extent(
+                link_and_save_items(collection, items, item_layout)
+            )
+    except Exception:
+        logger.exception(f"Encountered error creating {dataset_name}:{version} items")
+        # nothing links to the items saved so far until the version
+        # collection is saved, so don't leave them behind
+        delete_items(group_collections.values())
+        return
+
+    # a group without tiles would be saved with the placeholder extent, which
+    # isn't valid STAC, so leave it out of the version
+    for raster_group, collection in list(group_collections.items()):
+        if collection.get_links(pystac.RelType.ITEM):
+            continue
+        logger.warning(f"No tiles found for {dataset_name}:{version} {raster_group}")
+        if collection is not dataset_collection:
+            dataset_collection.remove_child(raster_group)
+        del group_collections[raster_group]
+
+    if not group_collections:
+        logger.error(f"No tiles found for {dataset_name}:{version}")
+        return
+
+    if len(raster_item_groups.keys()) > 1:
+        dataset_collection.extent = merge_extents(
+            [collection.extent for collection in group_collections.values()]
+        )
+        for collection in group_collections.values():
+            collection.save_object(stac_io=S3StacIO(), include_self_link=True)
+
+    # versions may be built on worker threads, so wait for this version's
+    # uploads here rather than leaving them to the caller's flush
+    S3StacIO.flush()
 
     return dataset_collection
 
 
+def create_dataset_version_collections(
+    dataset_name: str, versions: List[str], title: str, description: str
+) -> Dict[str, Collection]:
+    """
+    Creates the STAC collections of the given dataset versions, skipping
+    the ones that can't be created. Versions don't depend on each other
+    until they get linked, so they are built concurrently, at most
+    VERSION_WORKERS at a time.
+    """
+    version_collections = {}
+    building = deque()
+    for version in versions:
+        # the executor is shared by all datasets, so wait for the oldest
+        # version instead of submitting more than VERSION_WORKERS of them
+        if len(building) == VERSION_WORKERS:
+            done_version, future = building.popleft()
+            version_collections[done_version] = future.result()
+        building.append(
+            (
+                version,
+                _version_executor.submit(
+                    create_dataset_version_collection,
+                    dataset_name,
+                    version,
+                    title,
+                    description,
+                ),
+            )
+        )
+    for done_version, future in building:
+        version_collections[done_version] = future.result()
+
+    return {
+        version: collection
+        for version, collection in version_collections.items()
+        if collection
+    }
+
+
 def create_dataset_collection(dataset_name: str) -> Union[None, Collection]:
     """
     Creates STAC collection for a raster dataset with all its versions
     """
 
-    resp = requests.get(f"{DATA_API_URL}/dataset/{dataset_name}")
+    logger.info(f"Creating STAC collection for {dataset_name}")
+    latest_version_lookup = _lookup_executor.submit(_get_latest_version, dataset_name)
+    resp = get_session().get(f"{DATA_API_URL}/dataset/{dataset_name}")
     if not resp.ok:
         logger.error(f"Dataset {dataset_name} not found")
         return
-    dataset_data = resp.json()["data"]
+    dataset_data = orjson.loads(resp.content)["data"]
     versions = sorted(dataset_data["versions"])
     if len(versions) == 0:
         logger.warning(f"No dataset versions and assets found for {dataset_name}.")
         return
 
-    latest_version = _get_latest_version(dataset_name)
+    latest_version = latest_version_lookup.result()
     if not latest_version:
         logger.warning(
             f"Dataset {dataset_name} has no latest tagged version. Setting more recent version as latest"
         )
-        latest_version = sorted(versions)[-1]
-
-    dataset_collections = OrderedDict()
-    included_versions = versions[: versions.index(latest_version) + 1]
-    for version in included_versions:
-        dataset_collection: Union[Collection, None] = create_dataset_version_collection(
-            dataset_name,
-            version,
-            dataset_data["metadata"]["title"],
-            dataset_data["metadata"]["overview"],
-        )
-        if not dataset_collection:
-            continue
-        dataset_collections[version] = dataset_collection
+        latest_version = versions[-1]
+
+    included_versions = versions[: bisect_right(versions, latest_version)]
+    dataset_collections = create_dataset_version_collections(
+        dataset_name,
+        included_versions,
+        dataset_data["metadata"]["title"],
+        dataset_data["metadata"]["overview"],
+    )
 
     if not dataset_collections:
         logger.error(
@@ -264,38 +415,36 @@ def create_dataset_collection(dataset_name: str) -> Union[None, Collection]:
     latest_collection = version_and_store_collections(
         dataset_collections, latest_version
     )
+    # make sure all items and version collections are in S3 before the
+    # dataset gets linked from the catalog
+    S3StacIO.flush()
 
     return latest_collection
 
 
 def update_dataset_collection(dataset_collection):
-    resp = requests.get(f"{DATA_API_URL}/dataset/{dataset_collection.id}")
-    if not resp.ok:
-        logger.error(f"Dataset {dataset_collection.id} not found")
-        return
-    dataset_data = resp.json()["data"]
-    versions = sorted(dataset_data["versions"])
-
-    cat_latest_version = dataset_collection.to_dict()["version"]
+    # most datasets are already up to date, so check the latest version
+    # before fetching the dataset's versions
+    cat_latest_version = dataset_collection.extra_fields.get("version")
     api_latest_version = _get_latest_version(dataset_collection.id)
     if cat_latest_version == api_latest_version:
         logger.info(f"No new versions found for dataset {dataset_collection.id}.")
         return
 
-    start_idx = versions.index(cat_latest_version) + 1
+    resp = get_session().get(f"{DATA_API_URL}/dataset/{dataset_collection.id}")
+    if not resp.ok:
+        logger.error(f"Dataset {dataset_collection.id} not found")
+        return
+    dataset_data = orjson.loads(resp.content)["data"]
+    versions = sorted(dataset_data["versions"])
 
-    dataset_collections = OrderedDict()
-    new_versions = versions[start_idx:]
-    for version in new_versions:
-        dataset_version_collection = create_dataset_version_collection(
-            dataset_collection.id,
-            version,
-            dataset_collection.title,
-            dataset_collection.description,
-        )
-        if not dataset_version_collection:
-            continue
-        dataset_collections[version] = dataset_version_collection
+    new_versions = versions[bisect_right(versions, cat_latest_version) :]
+    dataset_collections = create_dataset_version_collections(
+        dataset_collection.id,
+        new_versions,
+        dataset_collection.title,
+        dataset_collection.description,
+    )
 
     latest_collection = version_and_store_collections(
         dataset_collections, api_latest_version
@@ -308,18 +457,15 @@ def update_dataset_collection(dataset_collection):
 
 
 def version_and_store_collections(dataset_collections, latest_version):
+    collections = list(dataset_collections.values())
     for index, (version, collection) in enumerate(dataset_collections.items()):
         version_ext = VersionExtension.ext(collection)
         version_ext.version = version
 
         if index > 0:
-            version_ext.predecessor = list(dataset_collections.values())[
-                index - 1
-            ].get_self_href()
-        if len(dataset_collections) > 1 and index < len(dataset_collections) - 1:
-            version_ext.successor = list(dataset_collections.values())[
-                index + 1
-            ].get_self_href()
+            version_ext.predecessor = collections[index - 1].get_self_href()
+        if index < len(collections) - 1:
+            version_ext.successor = collections[index + 1].get_self_href()
 
         collection.save_object(stac_io=S3StacIO(), include_self_link=True)
 
@@ -331,7 +477,7 @@ def version_and_store_collections(dataset_collections, latest_version):
     if latest_version:
         latest_collection = dataset_collections[latest_version].clone()
     else:
-        latest_collection = list(dataset_collections.values())[-1].clone()
+        latest_collection = collections[-1].clone()
 
     latest_collection.set_self_href(
         "/".join(
@@ -342,30 +488,161 @@ def version_and_store_collections(dataset_collections, latest_version):
     return latest_collection
 
 
+def link_and_save_items(
+    collection: Collection, items: Iterable[Item], strategy: HrefLayoutStrategy
+) -> Iterator[Item]:
+    """
+    Links items to the collection, saving each one as soon as it's linked.
+    The items get the same links as with Collection.add_item, but the
+    collection only links to their hrefs. add_item would keep every item
+    in memory, through the item link and the root's resolved object cache.
+    """
+    collection_dir = collection.get_self_href().rsplit("/", 1)[0]
+    root = collection.get_root()
+    for item in items:
+        # the self href is set before the root link, otherwise pystac caches
+        # the item in the root
+        item.set_self_href(strategy.get_href(item, collection_dir))
+        item.add_link(Link.root(root))
+        item.set_parent(collection)
+        item.set_collection(collection)
+        collection.add_link(Link.item(item.get_self_href()))
+
+        item.save_object(stac_io=S3StacIO(), include_self_link=False)
+        yield item
+
+
+def delete_items(collections: Iterable[Collection]) -> None:
+    """Deletes the saved items the collections link to"""
+    keys = [
+        urlparse(link.get_href()).path.lstrip("/")
+        for collection in collections
+        for link in collection.get_links(pystac.RelType.ITEM)
+    ]
+    try:
+        # the uploads have to be done before their objects can be deleted
+        S3StacIO.flush()
+    finally:
+        # DeleteObjects takes up to 1000 keys per request
+        for start in range(0, len(keys), 1000):
+            s3_client.delete_objects(
+                Bucket=STAC_BUCKET,
+                Delete={
+                    "Objects": [{"Key": key} for key in keys[start : start + 1000]],
+                    "Quiet": True,
+                },
+            )
+
+
+def get_extent(items: Iterable[Item]) -> Extent:
+    """
+    Returns the extent covering all items. Equivalent to Extent.from_items for
+    the items built here, which only carry a bbox and a datetime, but
+    without the per-item common metadata lookups. Items are consumed in a
+    single pass so they can come from a generator.
+    """
+    min_x = min_y = float("inf")
+    max_x = max_y = float("-inf")
+    start = end = None
+    for item in items:
+        if item.bbox is not None:
+            min_x = min(min_x, item.bbox[0])
+            min_y = min(min_y, item.bbox[1])
+            max_x = max(max_x, item.bbox[2])
+            max_y = max(max_y, item.bbox[3])
+        if item.datetime is not None:
+            item_datetime = (
+                item.datetime
+                if item.datetime.tzinfo
+                else item.datetime.replace(tzinfo=timezone.utc)
+            )
+            start = item_datetime if start is None else min(start, item_datetime)
+            end = item_datetime if end is None else max(end, item_datetime)
+
+    return Extent(
+        spatial=SpatialExtent(bboxes=[[min_x, min_y, max_x, max_y]]),
+        temporal=TemporalExtent(intervals=[[start, end]]),
+    )
+
+
+def merge_extents(extents: List[Extent]) -> Extent:
+    """Combines extents into a single one covering all of them"""
+    bboxes = [extent.spatial.bboxes[0] for extent in extents]
+    starts = [
+        extent.temporal.intervals[0][0]
+        for extent in extents
+        if extent.temporal.intervals[0][0] is not None
+    ]
+    ends = [
+        extent.temporal.intervals[0][1]
+        for extent in extents
+        if extent.temporal.intervals[0][1] is not None
+    ]
+
+    return Extent(
+        spatial=SpatialExtent(
+            bboxes=[
+                [
+                    min(bbox[0] for bbox in bboxes),
+                    min(bbox[1] for bbox in bboxes),
+                    max(bbox[2] for bbox in bboxes),
+                    max(bbox[3] for bbox in bboxes),
+                ]
+            ]
+        ),
+        temporal=TemporalExtent(
+            intervals=[[min(starts) if starts else None, max(ends) if ends else None]]
+        ),
+    )
+
+
 def get_dataset_type(assets):
     """Get whether the default assets are of raster, vector or tabular type"""
-    if list(filter(lambda asset: asset[0] == AssetType.database_table, assets)):
+    asset_types = {asset[0] for asset in assets}
+
+    if AssetType.database_table in asset_types:
         return AssetType.database_table
 
-    if list(filter(lambda asset: asset[0] == AssetType.raster_tile_set, assets)):
+    if AssetType.raster_tile_set in asset_types:
         return AssetType.raster_tile_set
 
-    if list(
-        filter(lambda asset: asset[0].lower() == AssetType.geo_database_table, assets)
-    ):
+    if AssetType.geo_database_table.lower() in {
+        asset_type.lower() for asset_type in asset_types
+    }:
         return AssetType.geo_database_table
 
     logger.error("Did not detect one of the known source asset types")
     return
 
 
+def _parse_version_date(date_str: str) -> datetime:
+    """
+    Parses the YYYYMMDD date of a version name. Same as
+    datetime.strptime(date_str, "%Y%m%d") without strptime's format parsing
+    """
+    if len(date_str) != 8 or not (date_str.isascii() and date_str.isdigit()):
+        raise ValueError(f"{date_str} is not a YYYYMMDD date")
+    return datetime(int(date_str[:4]), int(date_str[4:6]), int(date_str[6:]))
+
+
+def _get_child_link(catalog: Catalog, child_id: str) -> Optional[pystac.Link]:
+    """
+    Returns the unresolved link to the catalog child with the given id.
+    Children are laid out as {catalog_dir}/{child_id}/collection.json
+    """
+    for link in catalog.get_child_links():
+        if link.get_href().rsplit("/", 2)[-2] == child_id:
+            return link
+    return None
+
+
 def _get_latest_version(dataset_name: str) -> Union[str, None]:
-    resp = requests.get(f"{DATA_API_URL}/dataset/{dataset_name}/latest")
+    resp = get_session().get(f"{DATA_API_URL}/dataset/{dataset_name}/latest")
     if not resp.ok:
         logger.warning(f"No dataset version tagged as latest found for {dataset_name}")
         return
 
-    return resp.json()["data"]["version"]
+    return orjson.loads(resp.content)["data"]["version"]
 
 
 if __name__ == "__main__":
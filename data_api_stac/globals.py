@@ -6,5 +6,14 @@ logger = logging.getLogger("Data-API-STAC")
 logger.setLevel(logging.INFO)
 
 STAC_BUCKET = os.environ["STAC_BUCKET"]
+STAC_BUCKET_URL = f"https://{STAC_BUCKET}.s3.amazonaws.com"
 DATA_API_URL = os.environ["DATA_API_URL"]
 CATALOG_NAME = "gfw-catalog"
+
+# concurrency limits, can be tuned to the Data API's and S3's rate limits
+CATALOG_WORKERS = int(os.environ.get("CATALOG_WORKERS", 16))  # datasets built at once
+VERSION_WORKERS = int(os.environ.get("VERSION_WORKERS", 8))  # versions per dataset
+GEOSTORE_WORKERS = int(os.environ.get("GEOSTORE_WORKERS", 20))  # per tabular version
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 32))  # per requests session
+DATA_API_MAX_REQUESTS = int(os.environ.get("DATA_API_MAX_REQUESTS", 32))  # in flight
+S3_UPLOAD_WORKERS = int(os.environ.get("S3_UPLOAD_WORKERS", 32))  # concurrent PUTs
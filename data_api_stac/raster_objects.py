@@ -1,131 +1,188 @@
-import json
-import os
-
-import boto3
-import pandas as pd
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator
+from urllib.parse import urlparse
 
+import ijson
+import orjson
 from pystac import Asset, Item
 from pystac.media_type import MediaType
-from pystac.extensions.projection import ProjectionExtension
-from pystac.extensions.raster import RasterBand, RasterExtension
 
+from .clients import s3_client
 from .constants import RASTER_EXTENSIONS, AssetType
-from .globals import STAC_BUCKET
+from .globals import STAC_BUCKET_URL, logger
+
+# tiles.geojson files larger than this are streamed instead of parsed at once
+STREAMED_TILES_GEOJSON_SIZE = 16 * 1024 * 1024
+
 
+@dataclass
+class RasterTile:
+    """A tile from a tile set's tiles.geojson plus what is needed to build its item"""
 
-def create_raster_item(tile):
+    __slots__ = (
+        "tile_id",
+        "geometry",
+        "properties",
+        "href",
+        "bucket",
+        "tiles_base",
+        "epsg",
+        "item_datetime",
+    )
+
+    tile_id: str
+    geometry: Dict[str, Any]
+    properties: Dict[str, Any]
+    href: str
+    bucket: str
+    tiles_base: str
+    epsg: str
+    item_datetime: datetime
+
+
+def create_raster_band(band, spatial_resolution) -> Dict[str, Any]:
+    """Creates the raster:bands entry for a band of a tile's metadata"""
+    stats = band.get("stats")
+    if not isinstance(stats, dict):
+        stats = {}
+
+    return {
+        "data_type": band["data_type"],
+        "nodata": band["no_data"],
+        "spatial_resolution": spatial_resolution,
+        "statistics": {
+            "minimum": stats.get("min"),
+            "maximum": stats.get("max"),
+            "stddev": stats.get("std_dev"),
+        },
+    }
+
+
+def create_raster_item(tile: RasterTile):
     """Creates STAC item and associated asset for a given tile"""
+    # projection and raster fields are set directly instead of through the
+    # pystac extension wrappers, the extensions are in RASTER_EXTENSIONS
+    # spec specifies shape in Y, X order
+    shape = [tile.properties.get("height"), tile.properties.get("width")]
+
     item = Item(
         id=tile.tile_id,
         geometry=tile.geometry,
         bbox=tile.properties.get("extent"),
         datetime=tile.item_datetime,
         stac_extensions=RASTER_EXTENSIONS,
-        properties={},
+        properties={"proj:epsg": tile.epsg, "proj:shape": shape},
     )
 
     item.set_self_href(tile.href)
 
-    projection = ProjectionExtension.ext(item)
-    projection.epsg = tile.epsg
-    projection.shape = [
-        tile.properties.get("height"),
-        tile.properties.get("width"),
-    ]  # spec specifies shape in Y, X order
-
     asset_url = f"s3://{tile.bucket}/{tile.tiles_base}/{tile.tile_id}.tif"
 
-    asset = Asset(
-        asset_url, title=tile.tile_id, roles=["data"], media_type=MediaType.COG
-    )
-    raster = RasterExtension.ext(asset)
-
+    asset_fields = {}
     if tile.properties.get("bands") is not None:
-        raster.bands = [
-            RasterBand(
-                {
-                    "data_type": band["data_type"],
-                    "nodata": band["no_data"],
-                    "spatial_resolution": tile.properties["pixelxsize"],
-                    "statistics": {
-                        "minimum": (
-                            band.get("stats", {}).get("min")
-                            if isinstance(band["stats"], dict)
-                            else None
-                        ),
-                        "maximum": (
-                            band.get("stats", {}).get("max")
-                            if isinstance(band["stats"], dict)
-                            else None
-                        ),
-                        "stddev": (
-                            band.get("stats", {}).get("std_dev")
-                            if isinstance(band["stats"], dict)
-                            else None
-                        ),
-                    },
-                }
-            )
+        asset_fields["raster:bands"] = [
+            create_raster_band(band, tile.properties["pixelxsize"])
             for band in tile.properties["bands"]
         ]
+    asset_fields["proj:epsg"] = int(tile.epsg)
+    asset_fields["proj:shape"] = list(shape)
 
-    projection = ProjectionExtension.ext(asset)
-    projection.epsg = int(tile.epsg)
-    projection.shape = [
-        tile.properties.get("height"),
-        tile.properties.get("width"),
-    ]  # spec specifies shape in Y, X order
+    asset = Asset(
+        asset_url,
+        title=tile.tile_id,
+        roles=["data"],
+        media_type=MediaType.COG,
+        extra_fields=asset_fields,
+    )
 
     item.add_asset(key="data", asset=asset)
 
     return item
 
 
-def create_raster_collection(dataset, version, assets, version_datetime):
-
-    tile_sets = list(
-        filter(
-            lambda asset: asset[0] == AssetType.raster_tile_set
-            and "zoom" not in asset[1],
-            assets,
+def read_tile_features(bucket, key) -> Iterable[Dict[str, Any]]:
+    """
+    Returns the features of a tiles.geojson file. Small files are parsed in
+    one go, larger ones are read feature by feature as they are iterated.
+    """
+    resp = s3_client.get_object(Key=key, Bucket=bucket)
+    if resp["ContentLength"] <= STREAMED_TILES_GEOJSON_SIZE:
+        return orjson.loads(resp["Body"].read())["features"]
+
+    return ijson.items(resp["Body"], "features.item", use_float=True)
+
+
+def create_raster_items(
+    href_base, bucket, tiles_base, epsg, item_datetime
+) -> Iterator[Item]:
+    """
+    Lazily creates the STAC items for a tile set's tiles.geojson features.
+    The file is only opened once the first item is requested.
+    """
+    tiles_key = f"{tiles_base}/tiles.geojson"
+    logger.debug(f"Reading tiles from {tiles_key}")
+
+    for feature in read_tile_features(bucket, tiles_key):
+        properties = feature["properties"]
+        tile_id = properties["name"].split("/")[-1].split(".")[0]
+
+        tile = RasterTile(
+            tile_id=tile_id,
+            geometry=feature["geometry"],
+            properties=properties,
+            href=f"{href_base}/{tile_id}.json",
+            bucket=bucket,
+            tiles_base=tiles_base,
+            epsg=epsg,
+            item_datetime=item_datetime,
         )
-    )
+        yield create_raster_item(tile)
+
+
+def create_raster_collection(dataset, version, assets, version_datetime):
+    """
+    Returns the STAC items of each raster tile set group of a dataset
+    version. Each group's tiles.geojson is only read, and its items created,
+    as the group's iterator is consumed.
+    """
+
+    raster_tile_set = AssetType.raster_tile_set.value
+    tile_sets = [
+        asset
+        for asset in assets
+        if asset[0] == raster_tile_set and "zoom" not in asset[1]
+    ]
     if not tile_sets:
         print(f"no tile sets for version {version}")
         return
 
-    tile_set_groups = set([tile_set[1].split("/")[-3] for tile_set in tile_sets])
+    tile_set_groups = {tile_set[1].rsplit("/", 3)[-3] for tile_set in tile_sets}
+
+    # the tile sets only differ by group, so the bucket, path prefix and
+    # projection are the same for all of them
+    # s3://{bucket}/{dataset}/{version}/raster/epsg-{epsg}/.../{group}/geotiff/...
+    tiles_uri = urlparse(tile_sets[0][1])
+    bucket = tiles_uri.netloc
+    tiles_path = tiles_uri.path.lstrip("/").split("/")
+    tiles_prefix = "/".join(tiles_path[:-3])
+    tiles_epsg = tiles_path[3][len("epsg-") :]
 
     collections = {}
     for group in tile_set_groups:
-        tiles_root = os.path.dirname(tile_sets[0][1]).split("//")[1]
-        bucket = tiles_root.split("/")[0]
-
         # will expose the compressed gdal-geotiff version of the tilesets
-        tiles_base = f"{'/'.join(tiles_root.split('/')[1:-2])}/{group}/gdal-geotiff"
-        tiles_key = f"{tiles_base}/tiles.geojson"
-        tiles_epsg = tiles_root.split("/")[4].lstrip("epsg-")
-
-        s3_client = boto3.client("s3")
-        print("key", tiles_key)
-        resp = s3_client.get_object(Key=tiles_key, Bucket=bucket)
-
-        geojson = json.load(resp["Body"])
-        tiles_df = pd.DataFrame(geojson["features"])
-        items = []
-        for _, tile in tiles_df.iterrows():
-            collection = ""
-            if len(tile_set_groups) > 1:
-                collection = f"/{group}"
-            tile.tile_id = tile.properties["name"].split("/")[-1].split(".")[0]
-
-            tile.item_datetime = version_datetime
-            tile.href = f"https://{STAC_BUCKET}.s3.amazonaws.com/{dataset}/{version}{collection}/{tile.tile_id}.json"
-            tile.tiles_base = tiles_base
-            tile.bucket = bucket
-            tile.epsg = tiles_epsg
-            tile_item = create_raster_item(tile)
-            items.append(tile_item)
-        collections[group] = items
+        tiles_base = f"{tiles_prefix}/{group}/gdal-geotiff"
+
+        collection = ""
+        if len(tile_set_groups) > 1:
+            collection = f"/{group}"
+
+        collections[group] = create_raster_items(
+            f"{STAC_BUCKET_URL}/{dataset}/{version}{collection}",
+            bucket,
+            tiles_base,
+            tiles_epsg,
+            version_datetime,
+        )
 
     return collections
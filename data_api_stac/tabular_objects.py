@@ -1,32 +1,47 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+import orjson
 from pystac import Asset, Item
 from pystac.media_type import MediaType
+from requests import HTTPError
 
+from .clients import get_session
 from .constants import AreaType, GadmAreas, TabularDataType
-from .globals import DATA_API_URL, logger, STAC_BUCKET
+from .globals import DATA_API_URL, GEOSTORE_WORKERS, logger, STAC_BUCKET_URL
+
+
+@lru_cache(maxsize=512)
+def get_area_bbox(area_name):
+    """Fetches the bbox of an admin area from the geostore. Admin boundaries
+    rarely change, so lookups are cached for the life of the process; failed
+    lookups raise and are not cached."""
+    area_url = f"https://api.resourcewatch.org/v2/geostore/admin/{area_name}"
+    resp = get_session().get(area_url)
+    resp.raise_for_status()
+
+    return tuple(orjson.loads(resp.content)["data"]["attributes"]["bbox"])
 
 
 def create_tabular_item(dataset, version, version_datetime, area_name):
     "Create item for a tabular asset"
 
-    area_url = f"https://api.resourcewatch.org/v2/geostore/admin/{area_name}"
-    resp = requests.get(area_url)
-    if not resp.ok:
+    try:
+        area_bbox = get_area_bbox(area_name)
+    except HTTPError:
         logger.info(f"Could not fetch geometry for {area_name}")
         return
 
-    area_bbox = resp.json()["data"]["attributes"]["bbox"]
     item = Item(
         id=area_name,
         geometry=None,
-        bbox=area_bbox,
+        bbox=list(area_bbox),
         datetime=version_datetime,
         stac_extensions=None,
         properties={},
     )
 
-    item_href = f"https://{STAC_BUCKET}.s3.amazonaws.com/{dataset}/{version}/items/{area_name}.json"
+    item_href = f"{STAC_BUCKET_URL}/{dataset}/{version}/items/{area_name}.json"
     item.set_self_href(item_href)
 
     query_string = f"SELECT * from data WHERE iso = '{area_name}'"
@@ -62,7 +77,7 @@ def create_tabular_collection(dataset, version, version_datetime):
 
     areas_list_dataset = "__".join(dataset.split("__")[:2] + ["iso_whitelist"])
     query_str = "SELECT * from data"
-    resp = requests.get(
+    resp = get_session().get(
         f"{DATA_API_URL}/dataset/{areas_list_dataset}/latest/query",
         params={"sql": query_str},
     )
@@ -70,12 +85,18 @@ def create_tabular_collection(dataset, version, version_datetime):
         logger.error("Can not find areas to create STAC collection")
         return
 
-    areas = resp.json()["data"]
+    areas = orjson.loads(resp.content)["data"]
     area_names = [area[GadmAreas.iso] for area in areas]
 
-    items = []
-    for area_name in area_names:
-        item = create_tabular_item(dataset, version, version_datetime, area_name)
-        items.append(item)
+    # each item needs its own geostore lookup, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=GEOSTORE_WORKERS) as executor:
+        items = list(
+            executor.map(
+                lambda area_name: create_tabular_item(
+                    dataset, version, version_datetime, area_name
+                ),
+                area_names,
+            )
+        )
 
     return items
@@ -1,16 +1,20 @@
-import requests
+import orjson
 
 import data_api_stac.data_api_catalog as catalog_crud
+from data_api_stac.clients import get_session
 from data_api_stac.globals import logger, DATA_API_URL
 
 
 def handler(event, context):
     datasets = event.get("datasets")
     if datasets is None:
-        resp = requests.get(f"{DATA_API_URL}/datasets")
+        resp = get_session().get(f"{DATA_API_URL}/datasets")
         if not resp.ok:
             logger.error("Unable to fetch datasets. Not updating STAC catalog")
             return
+        datasets = [
+            dataset["dataset"] for dataset in orjson.loads(resp.content)["data"]
+        ]
 
     for dataset in datasets:
         logger.info(f"Updating {dataset} in catalog.")